@@ -0,0 +1,41 @@
+"""
+Request-scoped timestamps.
+
+now_iso() returns the current UTC time as an ISO-8601 string. Inside an
+HTTP request (including its background tasks) the first call mints the
+timestamp and later calls return the same string, so every row written by
+one request carries one consistent time. Outside a request (e.g. the FB
+poller) each call is fresh.
+"""
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+_request_now: ContextVar[Optional[dict]] = ContextVar("_request_now", default=None)
+
+
+def now_iso() -> str:
+    holder = _request_now.get()
+    if holder is None:
+        return datetime.now(timezone.utc).isoformat()
+    if "now" not in holder:
+        holder["now"] = datetime.now(timezone.utc).isoformat()
+    return holder["now"]
+
+
+class RequestClockMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own now_iso() slot."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_now.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_now.reset(token)
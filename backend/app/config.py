@@ -44,6 +44,12 @@ class Settings(BaseSettings):
     FRONTEND_URL: str
     ENVIRONMENT: str = "development"
 
+    # Time budget for a request's database calls; an overrun returns 504
+    REQUEST_DEADLINE_SECONDS: float = 2.0
+
+    # Rate-limit counters — memory:// is per worker; use redis://… with several workers
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+
     class Config:
         env_file = ".env"
 
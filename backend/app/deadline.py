@@ -0,0 +1,86 @@
+"""
+Request-scoped time budget for database calls.
+
+Every HTTP request may spend REQUEST_DEADLINE_SECONDS in total waiting on
+the database. within_deadline() bounds an upstream call by whatever is left
+of that budget and turns an overrun into a 504, so a slow Supabase fails the
+request fast and frees its pool slot instead of holding it for the full
+client timeout.
+
+Only time with at least one call inside within_deadline() counts: other
+awaits (Facebook token checks, bcrypt in a thread) don't eat into it, and
+calls overlapped with asyncio.gather are charged once, for their wall time.
+
+The budget stops applying once the response has started: background tasks
+and streamed bodies (e.g. the SSE recommendations) run unbounded, as do
+calls made outside a request such as the FB poller's.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# While the request's handler runs, holds the unspent budget ("left"), how
+# many bounded calls are in flight ("active") and since when ("since").
+# Emptied when the response starts. A dict, so updates are seen by every
+# copied context (e.g. gathered tasks).
+_request_deadline: ContextVar[Optional[dict]] = ContextVar("_request_deadline", default=None)
+
+# Even an exhausted budget gets this long, so the call fails with a 504 from
+# here rather than being cancelled before it is sent
+_MIN_TIMEOUT = 0.05
+
+
+async def within_deadline(call: Awaitable[T]) -> T:
+    """Await `call`, raising 504 if it outlives the current request's budget."""
+    holder = _request_deadline.get()
+    if not holder:
+        return await call
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    if holder["active"]:
+        remaining = holder["left"] - (now - holder["since"])
+    else:
+        remaining = holder["left"]
+        holder["since"] = now
+    holder["active"] += 1
+    try:
+        return await asyncio.wait_for(call, timeout=max(_MIN_TIMEOUT, remaining))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Database request timed out")
+    finally:
+        # Skip the bookkeeping if the response started (and cleared it) meanwhile
+        if holder:
+            holder["active"] -= 1
+            if not holder["active"]:
+                holder["left"] -= loop.time() - holder["since"]
+
+
+class RequestDeadlineMiddleware:
+    """Pure ASGI middleware giving each HTTP request its database time budget."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        holder = {"left": settings.REQUEST_DEADLINE_SECONDS, "active": 0, "since": 0.0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                holder.clear()
+            await send(message)
+
+        token = _request_deadline.set(holder)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_deadline.reset(token)
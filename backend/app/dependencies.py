@@ -1,11 +1,25 @@
+import hashlib
+import time
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from app.config import settings
+import jwt
 from app.services import supabase_service
+from app.services.auth_service import decode_token
 
 security = HTTPBearer()
 
+_ADMIN_ROLES = frozenset({"admin"})
+_STUDENT_ROLES = frozenset({"student", "admin"})
+
+# Verified (user_id, exp) claims keyed by a SHA-256 prefix of the bearer
+# token — the raw token is never stored. Skips JWT verification for repeat
+# requests. Only claims are cached: the user row comes from get_user_by_id,
+# whose cache update_user invalidates, so role changes and account binds
+# show up immediately.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -15,17 +29,23 @@ async def get_current_user(
         detail="Invalid or expired token",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    cache_key = hashlib.sha256(credentials.credentials.encode()).digest()[:16]
+    cached = _token_cache.get(cache_key)
+    if cached is not None and cached[1] <= time.time():
+        _token_cache.pop(cache_key, None)
+        cached = None
+
+    if cached is not None:
+        user_id = cached[0]
+    else:
+        try:
+            payload = decode_token(credentials.credentials)
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+        except jwt.PyJWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        _token_cache[cache_key] = (user_id, payload.get("exp", 0))
 
     user = await supabase_service.get_user_by_id(user_id)
     if user is None:
@@ -34,7 +54,7 @@ async def get_current_user(
 
 
 async def require_admin(current_user=Depends(get_current_user)):
-    if current_user["role"] != "admin":
+    if current_user["role"] not in _ADMIN_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
@@ -43,7 +63,7 @@ async def require_admin(current_user=Depends(get_current_user)):
 
 
 async def require_student(current_user=Depends(get_current_user)):
-    if current_user["role"] not in ("student", "admin"):
+    if current_user["role"] not in _STUDENT_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Student access required",
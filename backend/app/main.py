@@ -2,12 +2,19 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 
 from app.routes import auth, livestreams, comments, quizzes, qna, ai, classes, webhooks
+from app.clock import RequestClockMiddleware
 from app.config import settings
+from app.deadline import RequestDeadlineMiddleware
+from app.rate_limit import limiter
 from app.services.fb_poller import poll_loop
+from app.services.http import close_clients
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +32,7 @@ async def lifespan(app: FastAPI):
             await poller_task
         except asyncio.CancelledError:
             pass
+        await close_clients()
         logger.info("App shutdown — FB poller task stopped.")
 
 
@@ -32,21 +40,41 @@ app = FastAPI(
     title="LMS API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     # Disable docs in production
     docs_url="/docs" if settings.ENVIRONMENT != "production" else None,
     redoc_url="/redoc" if settings.ENVIRONMENT != "production" else None,
 )
 
+# Rate limits are declared per route with @limiter.limit(...); over-limit
+# requests get a 429 before the handler runs
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Middleware added later wraps middleware added earlier, so CORS goes last
+# to be the outermost layer.
+
+# Gives each request one shared now_iso() timestamp
+app.add_middleware(RequestClockMiddleware)
+
+# Starts each request's database time budget (504 once it runs out)
+app.add_middleware(RequestDeadlineMiddleware)
+
 # CORS — allow the configured frontend origin (set FRONTEND_URL on Railway)
 # Multiple origins can be comma-separated: https://a.vercel.app,https://b.vercel.app
 _origins = [o.strip() for o in settings.FRONTEND_URL.split(",") if o.strip()]
 
+# Explicit method/header lists let Starlette pre-build the preflight response
+# once, and max_age lets browsers skip repeat preflights for 24h. Preflights
+# are answered by the middleware itself, before the other middleware, routing
+# or auth dependencies run.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_origins,
     allow_credentials=True,
-    allow_methods=["*"],   # includes OPTIONS for preflight
-    allow_headers=["*"],   # includes Authorization
+    allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
 # Routers
@@ -63,3 +91,10 @@ app.include_router(webhooks.router, prefix="/api/webhooks", tags=["webhooks"])
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+# Any OPTIONS that CORSMiddleware didn't answer as a preflight lands here: no
+# dependencies, so it never touches auth or the database.
+@app.options("/{path:path}", include_in_schema=False)
+def options_fallback(path: str):
+    return Response(status_code=204)
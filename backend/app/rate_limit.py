@@ -0,0 +1,27 @@
+"""
+Per-endpoint rate limits (slowapi).
+
+Authenticated requests are limited per bearer token, anonymous ones (the
+Facebook webhook) per client IP. Counters live in RATE_LIMIT_STORAGE_URI:
+the in-memory default is per worker, so point it at Redis
+(e.g. redis://host:6379) when running several workers.
+"""
+
+import hashlib
+
+from fastapi import Request
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from app.config import settings
+
+
+def _rate_limit_key(request: Request) -> str:
+    auth = request.headers.get("authorization")
+    if auth:
+        # Hash so raw tokens never end up as keys in the counter store
+        return hashlib.sha256(auth.encode()).hexdigest()
+    return get_remote_address(request)
+
+
+limiter = Limiter(key_func=_rate_limit_key, storage_uri=settings.RATE_LIMIT_STORAGE_URI)
@@ -1,54 +1,145 @@
-from fastapi import APIRouter, HTTPException, Depends
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from app.clock import now_iso
 from app.dependencies import get_current_user
-from app.services.ollama_service import generate_school_recommendations
+from app.services.ollama_service import (
+    generate_school_recommendations,
+    input_fingerprint,
+    parse_recommendations,
+    quiz_count,
+    stream_school_recommendations,
+)
 from app.services import supabase_service as db
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 
 router = APIRouter()
 
+_NO_QUIZZES_MESSAGE = "Complete some quizzes first to get personalized recommendations."
+_UNAVAILABLE_MESSAGE = "AI recommendations are unavailable right now."
+
+# Cached recommendations are reused while the student's quiz results are
+# unchanged, up to this age
+_CACHE_MAX_AGE = timedelta(days=1)
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+def _assert_can_view(current_user: dict, student_id: str) -> None:
+    if current_user["role"] == "student" and current_user["id"] != student_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+async def _get_cached_recommendations(student_id: str, fingerprint: str) -> Optional[Dict]:
+    """Read-through cache lookup (a failed lookup is just a miss)."""
+    cutoff = (datetime.now(timezone.utc) - _CACHE_MAX_AGE).isoformat()
+    try:
+        row = await db.get_cached_ai_recommendation(student_id, fingerprint, cutoff)
+    except Exception:
+        return None
+    return row["recommendations"] if row else None
+
+
+async def _cache_recommendations(student_id: str, fingerprint: str, recommendations: Dict) -> None:
+    """Cache in Supabase (non-fatal if it fails)."""
+    try:
+        await db.upsert_ai_recommendation({
+            "student_id": student_id,
+            "recommendations": recommendations,
+            "input_hash": fingerprint,
+            "generated_at": now_iso(),
+        })
+    except Exception:
+        pass
+
+
+def _sse(data, event: str = "") -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {orjson.dumps(data).decode()}\n\n"
+
+
+# ─── Endpoints ────────────────────────────────────────────────────────────────
+
 @router.get("/recommendations/{student_id}")
 async def get_recommendations(
     student_id: str,
+    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_user),
 ):
-    if current_user["role"] == "student" and current_user["id"] != student_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _assert_can_view(current_user, student_id)
 
-    # 1. Fetch quiz answers using the new REST service
-    # We pass an empty string for quiz_id to get ALL answers for this student
-    answers = await db.get_student_quiz_answers(student_id, "")
-    
-    if not answers:
+    summary = await db.get_student_subject_summary(student_id)
+    if not summary:
         return {
             "student_id": student_id,
-            "message": "Complete some quizzes first to get personalized recommendations.",
+            "message": _NO_QUIZZES_MESSAGE,
             "recommendations": [],
         }
 
-    # 2. Logic to calculate scores (Keeping it simple for now)
-    quiz_results = []
-    # (Your existing logic to aggregate scores goes here, 
-    # but ensure it uses the 'answers' list we just fetched)
+    fingerprint = input_fingerprint(summary)
+    cached = await _get_cached_recommendations(student_id, fingerprint)
+    if cached is not None:
+        return cached
 
-    # 3. Generate recommendations via Ollama (fail gracefully if Ollama is offline)
+    # Generate recommendations via Ollama (fail gracefully if Ollama is offline)
     try:
-        recommendations = await generate_school_recommendations(student_id, quiz_results)
+        recommendations = await generate_school_recommendations(student_id, summary)
     except Exception:
         return {
             "student_id": student_id,
-            "message": "AI recommendations are unavailable right now.",
+            "message": _UNAVAILABLE_MESSAGE,
             "recommendations": [],
             "based_on_quizzes": 0,
         }
 
-    # 4. Cache in Supabase (non-fatal if it fails)
-    try:
-        await db.upsert_ai_recommendation({
-            "student_id": student_id,
-            "recommendations": recommendations,
-            "generated_at": datetime.utcnow().isoformat(),
-        })
-    except Exception:
-        pass
+    # The cache write doesn't affect the response, so let it run after we reply
+    background_tasks.add_task(_cache_recommendations, student_id, fingerprint, recommendations)
+    return recommendations
+
+
+@router.get("/recommendations/{student_id}/stream")
+async def stream_recommendations(
+    student_id: str,
+    current_user=Depends(get_current_user),
+):
+    """
+    Server-sent events version of get_recommendations.
+
+    Each model output fragment is sent as a `data:` event as soon as Ollama
+    produces it; the final parsed result (same shape as the JSON endpoint)
+    arrives as an `event: done` message, or `event: error` if Ollama fails.
+    """
+    _assert_can_view(current_user, student_id)
+    summary = await db.get_student_subject_summary(student_id)
+
+    async def events():
+        if not summary:
+            yield _sse(
+                {"student_id": student_id, "message": _NO_QUIZZES_MESSAGE, "recommendations": []},
+                event="done",
+            )
+            return
+
+        fingerprint = input_fingerprint(summary)
+        cached = await _get_cached_recommendations(student_id, fingerprint)
+        if cached is not None:
+            yield _sse(cached, event="done")
+            return
+
+        fragments: List[str] = []
+        result = None
+        try:
+            async for fragment in stream_school_recommendations(summary):
+                fragments.append(fragment)
+                yield _sse(fragment)
+            result = parse_recommendations(student_id, "".join(fragments), quiz_count(summary))
+            yield _sse(result, event="done")
+        except Exception:
+            yield _sse({"student_id": student_id, "message": _UNAVAILABLE_MESSAGE}, event="error")
+        finally:
+            # Only cache once the stream has fully drained
+            if result is not None:
+                await _cache_recommendations(student_id, fingerprint, result)
 
-    return recommendations
\ No newline at end of file
+    return StreamingResponse(events(), media_type="text/event-stream")
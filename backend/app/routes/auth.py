@@ -1,8 +1,10 @@
+import asyncio
+import hashlib
 import uuid
-import httpx
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
-from jose import JWTError
+from jwt import PyJWTError
 from app.services.auth_service import (
     hash_password,
     verify_password,
@@ -10,6 +12,7 @@ from app.services.auth_service import (
     create_refresh_token,
     decode_token,
 )
+from app.services.http import fb_client
 from app.services.supabase_service import (
     get_user_by_email,
     get_user_by_facebook_id,
@@ -48,42 +51,69 @@ class TokenResponse(BaseModel):
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
+# Fields the client is allowed to see (mirrors the frontend User type)
+_PUBLIC_USER_FIELDS = frozenset(
+    {"id", "email", "full_name", "role", "facebook_id", "avatar_url"}
+)
+
+
 def _safe_user(user: dict) -> dict:
-    """Strip sensitive fields before returning to client."""
-    return {k: v for k, v in user.items() if k != "hashed_password"}
+    """Keep only client-safe fields before returning to client."""
+    return {k: user[k] for k in _PUBLIC_USER_FIELDS & user.keys()}
+
+
+def _issue_tokens(user: dict) -> dict:
+    """Mint a fresh access + refresh token pair for a user."""
+    return {
+        "access_token": create_access_token({"sub": user["id"], "role": user["role"]}),
+        "refresh_token": create_refresh_token({"sub": user["id"]}),
+    }
+
+
+# Graph /me responses for recently verified tokens, keyed by token hash, so
+# frontend retries/refreshes don't repeat the round-trip to Facebook.
+_fb_token_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
 
 
 async def _verify_facebook_token(access_token: str) -> dict:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(
-            "https://graph.facebook.com/me",
-            params={"fields": "id,name,email,picture", "access_token": access_token},
-        )
+    cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+    cached = _fb_token_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    resp = await fb_client.get(
+        "/me",
+        params={"fields": "id,name,email,picture", "access_token": access_token},
+    )
     if resp.status_code != 200:
         raise HTTPException(status_code=401, detail="Invalid Facebook access token")
-    return resp.json()
+    fb_user = resp.json()
+    _fb_token_cache[cache_key] = fb_user
+    return fb_user
 
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
 
 @router.post("/register", response_model=TokenResponse)
 async def register(req: RegisterRequest):
-    if await get_user_by_email(req.email):
+    # bcrypt is deliberately slow CPU work — run it off the event loop, while
+    # the email lookup is in flight
+    existing, hashed_password = await asyncio.gather(
+        get_user_by_email(req.email),
+        asyncio.to_thread(hash_password, req.password),
+    )
+    if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user_data = {
         "id": str(uuid.uuid4()),
         "email": req.email,
-        "hashed_password": hash_password(req.password),
+        "hashed_password": hashed_password,
         "full_name": req.full_name,
         "role": "student",  # All self-registrations are students; set admin manually
     }
     user = await create_user(user_data)
-    return TokenResponse(
-        access_token=create_access_token({"sub": user["id"], "role": user["role"]}),
-        refresh_token=create_refresh_token({"sub": user["id"]}),
-        user=_safe_user(user),
-    )
+    return TokenResponse(**_issue_tokens(user), user=_safe_user(user))
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -91,14 +121,10 @@ async def login(req: LoginRequest):
     user = await get_user_by_email(req.email)
     if not user or not user.get("hashed_password"):
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    if not verify_password(req.password, user["hashed_password"]):
+    if not await asyncio.to_thread(verify_password, req.password, user["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    return TokenResponse(
-        access_token=create_access_token({"sub": user["id"], "role": user["role"]}),
-        refresh_token=create_refresh_token({"sub": user["id"]}),
-        user=_safe_user(user),
-    )
+    return TokenResponse(**_issue_tokens(user), user=_safe_user(user))
 
 
 @router.post("/refresh")
@@ -106,7 +132,7 @@ async def refresh_tokens(refresh_token: str):
     """Exchange a valid refresh token for a fresh access + refresh token pair."""
     try:
         payload = decode_token(refresh_token)
-    except JWTError:
+    except PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
     if payload.get("type") != "refresh":
@@ -120,11 +146,7 @@ async def refresh_tokens(refresh_token: str):
     if not user:
         raise HTTPException(status_code=401, detail="User no longer exists")
 
-    return {
-        "access_token": create_access_token({"sub": user["id"], "role": user["role"]}),
-        "refresh_token": create_refresh_token({"sub": user["id"]}),
-        "token_type": "bearer",
-    }
+    return {**_issue_tokens(user), "token_type": "bearer"}
 
 
 @router.post("/facebook/callback", response_model=TokenResponse)
@@ -183,11 +205,7 @@ async def facebook_oauth_callback(facebook_access_token: str):
             detail=f"Database error: {type(e).__name__}: {e}. Check that the 'users' table exists in Supabase with columns: id, email, hashed_password, full_name, role, facebook_id, avatar_url.",
         )
 
-    return TokenResponse(
-        access_token=create_access_token({"sub": user["id"], "role": user["role"]}),
-        refresh_token=create_refresh_token({"sub": user["id"]}),
-        user=_safe_user(user),
-    )
+    return TokenResponse(**_issue_tokens(user), user=_safe_user(user))
 
 
 @router.post("/bind-facebook")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from app.dependencies import get_current_user
 from app.services import supabase_service as db
 
@@ -8,3 +8,26 @@ router = APIRouter()
 @router.get("/")
 async def list_classes(current_user=Depends(get_current_user)):
     return await db.get_all_classes()
+
+
+@router.get("/{class_id}")
+async def get_class_page(class_id: str, current_user=Depends(get_current_user)):
+    """
+    Class details, its quizzes and the active Q&A session in one request.
+    Q&A questions are not included — fetch them from the Q&A endpoint, which
+    masks anonymous askers per viewer.
+    """
+    student_id = current_user["id"] if current_user["role"] == "student" else None
+    klass, enrolled = await db.get_class_page(class_id, student_id)
+    if not klass:
+        raise HTTPException(status_code=404, detail="Class not found")
+    if not enrolled:
+        raise HTTPException(status_code=403, detail="Not enrolled in this class")
+
+    quizzes = klass.pop("quizzes", None) or []
+    sessions = klass.pop("qna_sessions", None) or []
+    return {
+        "class": klass,
+        "quizzes": quizzes,
+        "active_qna_session": sessions[0] if sessions else None,
+    }
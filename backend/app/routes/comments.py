@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, constr
-from datetime import datetime
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pydantic import BaseModel, StringConstraints
+from typing import Annotated
+from app.clock import now_iso
 from app.dependencies import get_current_user, require_admin
 from app.services import supabase_service as db
 
@@ -9,31 +11,44 @@ router = APIRouter()
 
 class CommentRequest(BaseModel):
     livestream_id: str
-    content: constr(min_length=1, max_length=500)  # type: ignore
+    content: Annotated[str, StringConstraints(min_length=1, max_length=500)]
 
 
-async def _get_stream_or_404(livestream_id: str):
-    stream = await db.get_livestream(livestream_id)
+async def _get_stream_for_user(livestream_id: str, current_user: dict):
+    """404 if the stream is missing; 403 if a student isn't enrolled in its class."""
+    if current_user["role"] == "student":
+        stream, enrolled = await db.get_livestream_with_enrollment(
+            livestream_id, current_user["id"]
+        )
+    else:
+        stream = await db.get_livestream(livestream_id, columns="id,class_id,is_active")
+        enrolled = True
     if not stream:
         raise HTTPException(status_code=404, detail="Livestream not found")
-    return stream
-
-
-async def _assert_enrolled(student_id: str, class_id: str):
-    enrolled = await db.check_student_enrollment(student_id, class_id)
     if not enrolled:
         raise HTTPException(status_code=403, detail="Not enrolled in this class")
+    return stream
 
 
 @router.get("/{livestream_id}")
 async def get_comments(
     livestream_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0, description="Comments to skip, counting back from the newest"),
     current_user=Depends(get_current_user),
 ):
-    stream = await _get_stream_or_404(livestream_id)
-    if current_user["role"] == "student":
-        await _assert_enrolled(current_user["id"], stream["class_id"])
-    return await db.get_comments_for_livestream(livestream_id)
+    # The access check and the comment fetch are independent reads, so run
+    # them together; if access is denied the fetch is cancelled, not left
+    # running with nobody to collect its result
+    comments = asyncio.ensure_future(
+        db.get_comments_for_livestream(livestream_id, offset, limit)
+    )
+    try:
+        await _get_stream_for_user(livestream_id, current_user)
+    except BaseException:
+        comments.cancel()
+        raise
+    return await comments
 
 
 @router.post("/", status_code=201)
@@ -41,18 +56,16 @@ async def post_comment(
     req: CommentRequest,
     current_user=Depends(get_current_user),
 ):
-    stream = await _get_stream_or_404(req.livestream_id)
+    stream = await _get_stream_for_user(req.livestream_id, current_user)
     if not stream.get("is_active"):
         raise HTTPException(status_code=400, detail="Livestream is not active")
-    if current_user["role"] == "student":
-        await _assert_enrolled(current_user["id"], stream["class_id"])
 
     return await db.create_comment(
         {
             "student_id": current_user["id"],
             "livestream_id": req.livestream_id,
             "content": req.content,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": now_iso(),
         }
     )
 
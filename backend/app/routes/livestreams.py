@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from app.clock import now_iso
 from app.dependencies import get_current_user, require_admin
 from app.services import supabase_service as db
 
@@ -18,10 +19,14 @@ class CreateLivestreamRequest(BaseModel):
 
 
 @router.get("/")
-async def list_livestreams(current_user=Depends(get_current_user)):
+async def list_livestreams(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Omit for every row"),
+    offset: int = Query(0, ge=0),
+    current_user=Depends(get_current_user),
+):
     if current_user["role"] == "admin":
-        return await db.get_all_livestreams()
-    return await db.get_livestreams_for_student(current_user["id"])
+        return await db.get_all_livestreams(offset, limit)
+    return await db.get_livestreams_for_student(current_user["id"], offset, limit)
 
 
 @router.get("/{livestream_id}")
@@ -40,13 +45,11 @@ async def create_livestream(
     req: CreateLivestreamRequest,
     admin=Depends(require_admin),
 ):
-    return await db.create_livestream_record(
-        {
-            **req.model_dump(),
-            "created_by": admin["id"],
-            "is_active": False,
-        }
-    )
+    # mode="json" turns scheduled_at into an ISO string PostgREST accepts as-is
+    payload = req.model_dump(mode="json", exclude_none=True)
+    payload["created_by"] = admin["id"]
+    payload["is_active"] = False
+    return await db.create_livestream_record(payload)
 
 
 @router.patch("/{livestream_id}/activate")
@@ -55,7 +58,7 @@ async def activate_livestream(livestream_id: str, admin=Depends(require_admin)):
         livestream_id,
         {
             "is_active": True,
-            "started_at": datetime.utcnow().isoformat(),
+            "started_at": now_iso(),
         },
     )
     if not updated:
@@ -69,7 +72,7 @@ async def deactivate_livestream(livestream_id: str, admin=Depends(require_admin)
         livestream_id,
         {
             "is_active": False,
-            "ended_at": datetime.utcnow().isoformat(),
+            "ended_at": now_iso(),
         },
     )
     if not updated:
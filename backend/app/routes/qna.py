@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, constr
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, StringConstraints
+from typing import Annotated
+from app.clock import now_iso
 from app.dependencies import get_current_user, require_admin
+from app.http_cache import cached_json
+from app.rate_limit import limiter
 from app.services import supabase_service as db
 
 router = APIRouter()
 
+# Shared by every masked row; never mutated
+_ANONYMOUS_USER = {"full_name": "Anonymous"}
+
 
 class CreateSessionRequest(BaseModel):
     class_id: str
@@ -14,7 +20,7 @@ class CreateSessionRequest(BaseModel):
 
 class SubmitQuestionRequest(BaseModel):
     session_id: str
-    question_text: constr(min_length=3, max_length=500)  # type: ignore
+    question_text: Annotated[str, StringConstraints(min_length=3, max_length=500)]
     is_anonymous: bool = False
 
 
@@ -24,35 +30,49 @@ class AnswerQuestionRequest(BaseModel):
 
 @router.post("/sessions", status_code=201)
 async def create_session(req: CreateSessionRequest, admin=Depends(require_admin)):
-    return await db.create_qna_session(
+    session = await db.create_qna_session(
         {
             "class_id": req.class_id,
             "title": req.title,
             "created_by": admin["id"],
             "is_active": True,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": now_iso(),
         }
     )
+    db.get_active_qna_session.cache_invalidate(req.class_id)
+    return session
 
 
 @router.get("/sessions/active/{class_id}")
-async def get_active_session(class_id: str, current_user=Depends(get_current_user)):
+async def get_active_session(
+    request: Request, class_id: str, current_user=Depends(get_current_user)
+):
     session = await db.get_active_qna_session(class_id)
     if not session:
-        return {"active": False, "session": None}
+        return cached_json(request, {"active": False, "session": None})
 
-    # For student view: mask other students' identities on anonymous questions
+    # For student view: mask other students' identities on anonymous questions.
+    # The cached session is shared with other requests, so build a new session
+    # dict and copy only the rows that get masked.
     if current_user["role"] == "student":
-        for q in session.get("qna_questions") or []:
-            if q.get("is_anonymous") and q.get("student_id") != current_user["id"]:
-                q["student_id"] = None
-                q["users"] = {"full_name": "Anonymous"}
+        uid = current_user["id"]
+        session = {
+            **session,
+            "qna_questions": [
+                {**q, "student_id": None, "users": _ANONYMOUS_USER}
+                if q.get("is_anonymous") and q.get("student_id") != uid
+                else q
+                for q in session.get("qna_questions") or []
+            ],
+        }
 
-    return {"active": True, "session": session}
+    return cached_json(request, {"active": True, "session": session})
 
 
 @router.post("/questions", status_code=201)
+@limiter.limit("30/minute")
 async def submit_question(
+    request: Request,
     req: SubmitQuestionRequest,
     current_user=Depends(get_current_user),
 ):
@@ -60,16 +80,18 @@ async def submit_question(
     if not session or not session.get("is_active"):
         raise HTTPException(status_code=404, detail="No active Q&A session found")
 
-    return await db.submit_qna_question(
+    question = await db.submit_qna_question(
         {
             "session_id": req.session_id,
             "student_id": current_user["id"],
             "question_text": req.question_text,
             "is_anonymous": req.is_anonymous,
             "is_answered": False,
-            "submitted_at": datetime.utcnow().isoformat(),
+            "submitted_at": now_iso(),
         }
     )
+    db.get_active_qna_session.cache_invalidate(session["class_id"])
+    return question
 
 
 @router.patch("/questions/{question_id}/answer")
@@ -83,18 +105,25 @@ async def answer_question(
         {
             "is_answered": True,
             "answer_text": req.answer_text,
-            "answered_at": datetime.utcnow().isoformat(),
+            "answered_at": now_iso(),
         },
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Question not found")
+
+    # The active session's cached payload embeds its questions and answers
+    session = await db.get_qna_session(updated["session_id"])
+    if session:
+        db.get_active_qna_session.cache_invalidate(session["class_id"])
     return updated
 
 
 @router.patch("/sessions/{session_id}/close")
 async def close_session(session_id: str, admin=Depends(require_admin)):
-    await db.update_qna_session(
+    closed = await db.update_qna_session(
         session_id,
-        {"is_active": False, "ended_at": datetime.utcnow().isoformat()},
+        {"is_active": False, "ended_at": now_iso()},
     )
+    if closed:
+        db.get_active_qna_session.cache_invalidate(closed["class_id"])
     return {"message": "Q&A session closed"}
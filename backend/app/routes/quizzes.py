@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Optional, List
+from app.clock import now_iso
 from app.dependencies import get_current_user, require_admin
+from app.http_cache import cached_json
+from app.rate_limit import limiter
 from app.services import supabase_service as db
 
 router = APIRouter()
@@ -10,10 +13,23 @@ router = APIRouter()
 
 # ─── Schemas ──────────────────────────────────────────────────────────────────
 
+# Matches the CHECK constraints on quiz_questions / quiz_answers
+AnswerOption = Literal["a", "b", "c", "d"]
+
+
 class QuizAnswerRequest(BaseModel):
     quiz_id: str
     question_id: str
-    selected_option: str  # "a" | "b" | "c" | "d"
+    selected_option: AnswerOption
+
+
+class BulkAnswer(BaseModel):
+    question_id: str
+    selected_option: AnswerOption
+
+
+class QuizAnswersBulkRequest(BaseModel):
+    answers: Annotated[List[BulkAnswer], Field(min_length=1, max_length=100)]
 
 
 class TriggerQuizRequest(BaseModel):
@@ -36,127 +52,163 @@ class CreateQuestionRequest(BaseModel):
     option_b: str
     option_c: Optional[str] = None
     option_d: Optional[str] = None
-    correct_answer: str  # "a" | "b" | "c" | "d"
+    correct_answer: AnswerOption
     points: int = 1
     order_index: int = 0
 
 
-# ─── Helpers ──────────────────────────────────────────────────────────────────
-
-async def _assert_enrolled(student_id: str, class_id: str):
-    enrolled = await db.check_student_enrollment(student_id, class_id)
-    if not enrolled:
-        raise HTTPException(status_code=403, detail="Not enrolled in this class")
-
-
 # ─── Endpoints ────────────────────────────────────────────────────────────────
 
 @router.get("/class/{class_id}")
-async def list_class_quizzes(class_id: str, current_user=Depends(get_current_user)):
-    if current_user["role"] == "student":
-        await _assert_enrolled(current_user["id"], class_id)
-    return await db.get_quizzes_for_class(class_id)
+async def list_class_quizzes(
+    request: Request, class_id: str, current_user=Depends(get_current_user)
+):
+    if current_user["role"] != "student":
+        return cached_json(request, await db.get_quizzes_for_class(class_id))
+
+    # Independent lookups — overlap them; the list is discarded if not enrolled
+    enrolled, quizzes = await asyncio.gather(
+        db.check_student_enrollment(current_user["id"], class_id),
+        db.get_quizzes_for_class(class_id),
+    )
+    if not enrolled:
+        raise HTTPException(status_code=403, detail="Not enrolled in this class")
+    return cached_json(request, quizzes)
 
 
 @router.get("/{quiz_id}")
-async def get_quiz_detail(quiz_id: str, current_user=Depends(get_current_user)):
+async def get_quiz_detail(
+    request: Request, quiz_id: str, current_user=Depends(get_current_user)
+):
     quiz = await db.get_quiz(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    # Strip correct answers from student view — they must be kept server-side
+    # Strip correct answers from student view — they must be kept server-side.
+    # Build copies: the cached quiz is shared with other requests.
     if current_user["role"] == "student":
-        for q in quiz.get("quiz_questions") or []:
-            q.pop("correct_answer", None)
+        quiz = {
+            **quiz,
+            "quiz_questions": [
+                {k: v for k, v in q.items() if k != "correct_answer"}
+                for q in quiz.get("quiz_questions") or []
+            ],
+        }
 
-    return quiz
+    return cached_json(request, quiz)
 
 
 @router.post("/", status_code=201)
 async def create_quiz(req: CreateQuizRequest, admin=Depends(require_admin)):
-    return await db.create_quiz_record(
-        {**req.model_dump(), "created_by": admin["id"], "is_active": False}
-    )
+    payload = req.model_dump(mode="json", exclude_none=True)
+    payload["created_by"] = admin["id"]
+    payload["is_active"] = False
+    return await db.create_quiz_record(payload)
 
 
 @router.post("/questions", status_code=201)
 async def add_question(req: CreateQuestionRequest, admin=Depends(require_admin)):
-    return await db.add_quiz_question(req.model_dump())
+    question = await db.add_quiz_question(req.model_dump(mode="json", exclude_none=True))
+    db.get_quiz.cache_invalidate(req.quiz_id)
+    db.get_quiz_score.cache_clear()
+    return question
 
 
 @router.post("/trigger")
 async def trigger_live_quiz(req: TriggerQuizRequest, admin=Depends(require_admin)):
     updated = await db.update_quiz_record(
         req.quiz_id,
-        {"is_active": True, "triggered_at": datetime.utcnow().isoformat()},
+        {"is_active": True, "triggered_at": now_iso()},
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Quiz not found")
+    db.get_quiz.cache_invalidate(req.quiz_id)
+    db.get_quiz_score.cache_clear()
     return {"message": "Quiz triggered", "quiz": updated}
 
 
 @router.post("/{quiz_id}/close")
 async def close_quiz(quiz_id: str, admin=Depends(require_admin)):
     await db.update_quiz_record(quiz_id, {"is_active": False})
+    db.get_quiz.cache_invalidate(quiz_id)
+    db.get_quiz_score.cache_clear()
     return {"message": "Quiz closed"}
 
 
 @router.post("/{quiz_id}/answers")
+@limiter.limit("60/minute")
 async def submit_answer(
+    request: Request,
     quiz_id: str,
     req: QuizAnswerRequest,
     current_user=Depends(get_current_user),
 ):
-    if req.selected_option not in ("a", "b", "c", "d"):
-        raise HTTPException(status_code=422, detail="selected_option must be a, b, c, or d")
-
-    quiz = await db.get_quiz(quiz_id)
-    if not quiz:
+    # Quiz lookup, duplicate check and insert happen in a single RPC round-trip
+    result = await db.submit_quiz_answer_checked(
+        current_user["id"], quiz_id, req.question_id, req.selected_option
+    )
+    outcome = result.get("status")
+    if outcome == "not_found":
         raise HTTPException(status_code=404, detail="Quiz not found")
-    if not quiz.get("is_active"):
+    if outcome == "inactive":
         raise HTTPException(status_code=400, detail="Quiz is not currently active")
-
-    already_answered = await db.check_quiz_answer_exists(current_user["id"], req.question_id)
-    if already_answered:
+    if outcome == "duplicate":
         raise HTTPException(status_code=400, detail="Answer already submitted for this question")
 
-    answer = await db.submit_quiz_answer(
-        {
-            "student_id": current_user["id"],
-            "quiz_id": quiz_id,
-            "question_id": req.question_id,
-            "selected_option": req.selected_option,
-            "submitted_at": datetime.utcnow().isoformat(),
-        }
+    db.get_quiz_score.cache_invalidate(current_user["id"], quiz_id)
+    return {"message": "Answer submitted", "answer_id": result["answer"]["id"]}
+
+
+@router.post("/{quiz_id}/answers/bulk")
+@limiter.limit("60/minute")
+async def submit_answers_bulk(
+    request: Request,
+    quiz_id: str,
+    req: QuizAnswersBulkRequest,
+    current_user=Depends(get_current_user),
+):
+    """Submit several answers in one request; already-answered questions are skipped."""
+    result = await db.submit_quiz_answers_checked(
+        current_user["id"], quiz_id, [a.model_dump() for a in req.answers]
     )
-    return {"message": "Answer submitted", "answer_id": answer["id"]}
+    outcome = result.get("status")
+    if outcome == "not_found":
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if outcome == "inactive":
+        raise HTTPException(status_code=400, detail="Quiz is not currently active")
+
+    db.get_quiz_score.cache_invalidate(current_user["id"], quiz_id)
+    inserted = result["answers"]
+    return {
+        "message": "Answers submitted",
+        "answer_ids": [a["id"] for a in inserted],
+        "skipped": len(req.answers) - len(inserted),
+    }
 
 
 @router.get("/{quiz_id}/my-results")
 async def get_my_results(quiz_id: str, current_user=Depends(get_current_user)):
     """Students can only see their own results."""
-    quiz = await db.get_quiz(quiz_id)
-    if not quiz:
+    result = await db.get_quiz_score(current_user["id"], quiz_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    answers = await db.get_student_quiz_answers(current_user["id"], quiz_id)
-    questions = quiz.get("quiz_questions") or []
-    correct_map = {q["id"]: q["correct_answer"] for q in questions}
-    total = len(questions)
-    score = sum(
-        1 for a in answers if correct_map.get(a["question_id"]) == a["selected_option"]
-    )
-
+    score, total = result["score"], result["total"]
     return {
         "quiz_id": quiz_id,
         "score": score,
         "total": total,
         "percentage": round((score / total * 100) if total else 0, 2),
-        "answers": answers,
+        "answers": result["answers"],
     }
 
 
 @router.get("/{quiz_id}/results")
-async def get_all_results(quiz_id: str, admin=Depends(require_admin)):
-    """Admin only: all students' results for a quiz."""
-    return await db.get_quiz_results_admin(quiz_id)
+async def get_all_results(
+    quiz_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Omit for every row"),
+    offset: int = Query(0, ge=0),
+    admin=Depends(require_admin),
+):
+    """Admin only: all students' answers for a quiz (pass limit/offset to page)."""
+    return await db.get_quiz_results_admin(quiz_id, offset, limit)
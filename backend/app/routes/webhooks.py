@@ -13,13 +13,22 @@ immediately on their dashboard — no manual steps needed.
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Query, Request
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from app.clock import now_iso
 from app.config import settings
+from app.rate_limit import limiter
 from app.services import supabase_service as db
+from app.services.fb_poller import is_known_live
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Videos synced as LIVE in the last minute. Facebook re-sends the same LIVE
+# event several times per stream; repeats inside this window skip Supabase.
+_recently_live: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
 
 # ─── Webhook verification (Facebook calls this once during setup) ──────────────
 
@@ -38,54 +47,71 @@ async def verify_webhook(
 # ─── Webhook event receiver ────────────────────────────────────────────────────
 
 @router.post("/facebook")
-async def receive_webhook(request: Request):
+@limiter.limit("120/minute")
+async def receive_webhook(request: Request, background_tasks: BackgroundTasks):
     """
     Facebook sends a POST when a live video changes status.
     We look for LIVE status and auto-create + activate the stream.
     """
-    payload = await request.json()
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
     logger.info("FB webhook payload: %s", payload)
 
-    for entry in payload.get("entry", []):
-        for change in entry.get("changes", []):
-            value = change.get("value", {})
-            status = value.get("status", "")
-            video_id = str(value.get("video_id", ""))
+    changes = [
+        change.get("value", {})
+        for entry in payload.get("entry", [])
+        for change in entry.get("changes", [])
+    ]
+
+    # Facebook expects a 200 response quickly and retries slow deliveries, so
+    # acknowledge now and sync Supabase after the response is sent
+    background_tasks.add_task(_process_changes, changes)
+    return {"ok": True}
+
 
-            if not video_id:
-                continue
+async def _process_changes(changes: list) -> None:
+    """Apply each live-video status change; one failure doesn't stop the rest."""
+    for value in changes:
+        status = value.get("status", "")
+        video_id = str(value.get("video_id", ""))
+        if not video_id:
+            continue
 
+        try:
             if status == "LIVE":
                 await _handle_live_started(video_id, value)
             elif status in ("VOD", "PROCESSING"):
                 await _handle_live_ended(video_id)
-
-    # Facebook expects a 200 response quickly
-    return {"ok": True}
+        except Exception as exc:
+            logger.warning("FB webhook: failed to sync video %s: %s", video_id, exc)
 
 
 async def _handle_live_started(video_id: str, value: dict):
     """Create and activate a livestream record when a Facebook Live starts."""
+    if video_id in _recently_live or is_known_live(video_id):
+        return
+
     # Don't create duplicates if webhook fires more than once
     existing = await db.get_livestream_by_facebook_video_id(video_id)
     if existing:
         if not existing.get("is_active"):
-            from datetime import datetime
             await db.update_livestream_record(
                 existing["id"],
-                {"is_active": True, "started_at": datetime.utcnow().isoformat()},
+                {"is_active": True, "started_at": now_iso()},
             )
             logger.info("Re-activated existing livestream %s", existing["id"])
+        _recently_live[video_id] = True
         return
 
     title = value.get("title") or "Live Class"
-    from datetime import datetime
     data: dict = {
         "title": title,
         "facebook_video_id": video_id,
         "is_active": True,
         "is_private": False,
-        "started_at": datetime.utcnow().isoformat(),
+        "started_at": now_iso(),
     }
     if settings.FACEBOOK_DEFAULT_GROUP_ID:
         data["facebook_group_id"] = settings.FACEBOOK_DEFAULT_GROUP_ID
@@ -93,16 +119,17 @@ async def _handle_live_started(video_id: str, value: dict):
         data["class_id"] = settings.FACEBOOK_DEFAULT_CLASS_ID
 
     record = await db.create_livestream_record(data)
+    _recently_live[video_id] = True
     logger.info("Auto-created livestream %s for video %s", record.get("id"), video_id)
 
 
 async def _handle_live_ended(video_id: str):
     """Deactivate the livestream record when the Facebook Live ends."""
+    _recently_live.pop(video_id, None)
     existing = await db.get_livestream_by_facebook_video_id(video_id)
     if existing and existing.get("is_active"):
-        from datetime import datetime
         await db.update_livestream_record(
             existing["id"],
-            {"is_active": False, "ended_at": datetime.utcnow().isoformat()},
+            {"is_active": False, "ended_at": now_iso()},
         )
         logger.info("Auto-deactivated livestream %s", existing["id"])
@@ -0,0 +1,78 @@
+"""
+In-process TTL caching for hot, slow-changing async lookups.
+
+Results are cached per worker process, so a write on one worker only
+invalidates that worker's copy — keep TTLs short enough that the others
+catch up on their own.
+"""
+
+import asyncio
+import contextvars
+import functools
+from typing import Any, Awaitable, Callable, Dict
+
+from cachetools import TTLCache
+
+from app.deadline import within_deadline
+
+
+def ttl_cached(maxsize: int, ttl: float):
+    """
+    Cache an async function's result per positional-argument tuple for `ttl`
+    seconds.
+
+    Concurrent misses for the same arguments share one in-flight call
+    (single-flight), so a burst of identical requests costs one query.
+    Exceptions are not cached. Cached values are shared between callers and
+    must be treated as read-only.
+
+    The shared call runs outside any request's context, so it is not bound
+    by whichever caller started it; each caller instead waits for it within
+    its own remaining time budget (app/deadline.py).
+
+    The wrapper exposes `cache_invalidate(*args)` and `cache_clear()`.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        inflight: Dict[tuple, asyncio.Future] = {}
+
+        def _store(args: tuple, task: asyncio.Future) -> None:
+            # An invalidation while the call was in flight drops its result
+            if inflight.get(args) is not task:
+                return
+            del inflight[args]
+            if not task.cancelled() and task.exception() is None:
+                cache[args] = task.result()
+
+        @functools.wraps(fn)
+        async def wrapper(*args):
+            try:
+                return cache[args]
+            except KeyError:
+                pass
+
+            task = inflight.get(args)
+            if task is None:
+                # A fresh context: the task must not inherit the first
+                # caller's deadline (or any other request-scoped state)
+                task = contextvars.Context().run(asyncio.ensure_future, fn(*args))
+                inflight[args] = task
+                task.add_done_callback(functools.partial(_store, args))
+            # shield: one caller disconnecting or timing out must not cancel
+            # the shared call
+            return await within_deadline(asyncio.shield(task))
+
+        def cache_invalidate(*args) -> None:
+            cache.pop(args, None)
+            inflight.pop(args, None)
+
+        def cache_clear() -> None:
+            cache.clear()
+            inflight.clear()
+
+        wrapper.cache_invalidate = cache_invalidate
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -3,7 +3,9 @@ Facebook Live Graph API Poller
 ==============================
 Replaces Facebook webhooks (which no longer work for private groups).
 
-Every POLL_INTERVAL seconds this task calls:
+Every POLL_INTERVAL seconds while a stream is live (backing off to
+MAX_IDLE_INTERVAL when nothing is, and up to MAX_ERROR_INTERVAL with jitter
+after Graph API errors) this task calls:
     GET https://graph.facebook.com/v25.0/{target_id}/live_videos?status=LIVE
 
 - If FACEBOOK_DEFAULT_GROUP_ID is set  → polls that group's live videos
@@ -22,22 +24,45 @@ Optional:
 
 import asyncio
 import logging
-from datetime import datetime, timezone
+import os
+import random
+import tempfile
+import time
 
 import httpx
 
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: one worker, nothing to coordinate
+    fcntl = None
+
+from app.clock import now_iso
 from app.config import settings
 from app.services import supabase_service
 
 logger = logging.getLogger(__name__)
 
-POLL_INTERVAL = 60  # seconds between Graph API calls
+POLL_INTERVAL = 30  # seconds between Graph API calls while a stream is live
+MAX_IDLE_INTERVAL = 300  # idle polls double the interval up to this
+MAX_ERROR_INTERVAL = 600  # failed polls double it up to this, plus jitter
+TOKEN_BAD_BACKOFF = 600  # seconds every worker skips Graph API after a token error
+
+# Marker shared by all workers on the host: while it is fresh, the token is
+# known bad and nobody re-polls (or re-logs) until it expires.
+_TOKEN_BAD_FLAG = os.path.join(tempfile.gettempdir(), "livefb_fb_token_bad")
+# Held while a worker checks and raises the flag, so only one of them does
+_TOKEN_BAD_LOCK = _TOKEN_BAD_FLAG + ".lock"
 
 # In-memory set of facebook_video_id values currently known to be LIVE.
 # Reset on service restart; the first poll re-discovers any active streams.
 _active_video_ids: set[str] = set()
 
 
+def is_known_live(video_id: str) -> bool:
+    """True if the poller has already synced this video as LIVE."""
+    return video_id in _active_video_ids
+
+
 # ─── Public entry point ───────────────────────────────────────────────────────
 
 async def poll_loop() -> None:
@@ -57,111 +82,176 @@ async def poll_loop() -> None:
         return
 
     logger.info(
-        "FB Poller: started — target=%s  interval=%ds", target_id, POLL_INTERVAL
+        "FB Poller: started — target=%s  interval=%d-%ds",
+        target_id, POLL_INTERVAL, MAX_IDLE_INTERVAL,
     )
 
-    async with httpx.AsyncClient(timeout=15) as client:
+    interval = POLL_INTERVAL
+    # One client for the poller's lifetime. The keep-alive window outlasts
+    # the longest idle interval so the HTTP/2 connection (and its TLS
+    # session) survives between polls. The token goes in the Authorization
+    # header so it never appears in request URLs or their logs.
+    async with httpx.AsyncClient(
+        base_url="https://graph.facebook.com/v25.0",
+        http2=True,
+        timeout=15,
+        limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=600),
+        headers={"Authorization": f"Bearer {settings.FACEBOOK_POLL_USER_TOKEN}"},
+    ) as client:
         while True:
             try:
-                await _check(client, target_id)
+                live_count = await _check(client, target_id)
             except asyncio.CancelledError:
                 logger.info("FB Poller: stopped.")
                 raise
             except Exception as exc:  # pragma: no cover
                 logger.warning("FB Poller: unhandled error: %s", exc)
-            await asyncio.sleep(POLL_INTERVAL)
+                live_count = None
+
+            if live_count is None:
+                # Exponential backoff; jitter keeps workers from retrying in lockstep
+                interval = min(interval * 2, MAX_ERROR_INTERVAL)
+                await asyncio.sleep(interval + random.uniform(0, 5))
+                continue
+            if live_count:
+                interval = POLL_INTERVAL
+            else:
+                interval = min(interval * 2, MAX_IDLE_INTERVAL)
+            await asyncio.sleep(interval)
 
 
 # ─── Internal helpers ─────────────────────────────────────────────────────────
 
-async def _check(client: httpx.AsyncClient, target_id: str) -> None:
-    """One poll cycle: fetch live videos and sync with Supabase."""
+async def _check(client: httpx.AsyncClient, target_id: str) -> int | None:
+    """
+    One poll cycle: fetch live videos and sync with Supabase.
+    Returns how many videos are live, or None if the Graph API call failed.
+    """
+    if _token_flagged_bad():
+        return None
+
     resp = await client.get(
-        f"https://graph.facebook.com/v25.0/{target_id}/live_videos",
-        params={
-            "status": "LIVE",
-            "fields": "id,title,description,status",
-            "access_token": settings.FACEBOOK_POLL_USER_TOKEN,
-        },
+        f"/{target_id}/live_videos",
+        params={"status": "LIVE", "fields": "id,title,description,status"},
     )
 
     if resp.status_code == 400:
         body = resp.json()
         err = body.get("error", {})
-        # Token expired — log clearly so the admin knows to refresh it
+        # Token expired — log clearly so the admin knows to refresh it. Only
+        # the worker that raises the flag logs; the rest stop polling quietly.
         if err.get("code") in (190, 102):
-            logger.error(
-                "FB Poller: access token expired or invalid. "
-                "Please generate a new long-lived token and update FACEBOOK_POLL_USER_TOKEN in Railway."
-            )
-            # Back off for 10 minutes before retrying (don't spam the log)
-            await asyncio.sleep(600)
-            return
+            if _flag_token_bad():
+                logger.error(
+                    "FB Poller: access token expired or invalid. "
+                    "Please generate a new long-lived token and update FACEBOOK_POLL_USER_TOKEN in Railway."
+                )
+            return None
         logger.warning("FB Poller: Graph API 400: %s", err.get("message", resp.text[:200]))
-        return
+        return None
 
     if resp.is_error:
         logger.warning("FB Poller: Graph API %d: %s", resp.status_code, resp.text[:200])
-        return
+        return None
 
     live_videos: list[dict] = resp.json().get("data", [])
     current_ids = {v["id"] for v in live_videos}
 
     # ── New streams that just started ────────────────────────────────────────
-    for video in live_videos:
-        vid_id = video["id"]
-        if vid_id not in _active_video_ids:
-            logger.info("FB Poller: new live stream detected → %s", vid_id)
-            await _upsert_live(video)
-            _active_video_ids.add(vid_id)
+    started = [v for v in live_videos if v["id"] not in _active_video_ids]
+    for video in started:
+        logger.info("FB Poller: new live stream detected → %s", video["id"])
+    if await _sync_started(started):
+        _active_video_ids.update(v["id"] for v in started)
 
     # ── Streams that just ended ───────────────────────────────────────────────
     ended = _active_video_ids - current_ids
     for vid_id in ended:
         logger.info("FB Poller: live stream ended → %s", vid_id)
-        await _mark_ended(vid_id)
-        _active_video_ids.discard(vid_id)
+    if await _sync_ended(ended):
+        _active_video_ids.difference_update(ended)
 
+    return len(current_ids)
 
-async def _upsert_live(video: dict) -> None:
-    """Create a Supabase livestream record for a newly detected live video."""
-    vid_id = video["id"]
-    title = (video.get("title") or "Facebook Live").strip() or "Facebook Live"
 
-    # Avoid duplicates if the service was restarted mid-stream
-    existing = await supabase_service.get_livestream_by_facebook_video_id(vid_id)
-    if existing:
-        # Stream already in DB — just make sure is_active is True
-        if not existing.get("is_active"):
-            await supabase_service.update_livestream_record(
-                existing["id"], {"is_active": True}
-            )
-        _active_video_ids.add(vid_id)
-        return
+def _token_flagged_bad() -> bool:
+    try:
+        return time.time() - os.path.getmtime(_TOKEN_BAD_FLAG) < TOKEN_BAD_BACKOFF
+    except OSError:
+        return False
+
+
+def _flag_token_bad() -> bool:
+    """Atomically raise the token-bad flag; True only for the worker that raised it."""
+    if _token_flagged_bad():
+        return False
+    fd = os.open(_TOKEN_BAD_LOCK, os.O_CREAT | os.O_WRONLY)
+    try:
+        if fcntl is not None:
+            # flock is released by the kernel even if this worker dies
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        # Re-check under the lock: another worker may have just raised it
+        if _token_flagged_bad():
+            return False
+        # Refreshing the mtime also takes over a stale flag from an earlier outage
+        with open(_TOKEN_BAD_FLAG, "a"):
+            pass
+        os.utime(_TOKEN_BAD_FLAG, None)
+        return True
+    finally:
+        os.close(fd)
+
+
+# Each sync is a fixed number of Supabase requests however many videos
+# changed; on failure the ids stay pending and are retried next poll.
+
+async def _sync_started(videos: list[dict]) -> bool:
+    """Create records for newly live videos and re-activate any that already exist."""
+    if not videos:
+        return True
+    now = now_iso()
+    rows = [_new_livestream_row(v, now) for v in videos]
+    video_ids = [v["id"] for v in videos]
+    try:
+        # Rows already in the DB (e.g. the service restarted mid-stream) are
+        # skipped by the insert, then switched back on by the update
+        await supabase_service.insert_missing_livestreams(rows)
+        await supabase_service.update_livestreams_by_video_ids(video_ids, {"is_active": True})
+    except Exception as exc:
+        logger.warning("FB Poller: failed to sync started videos %s: %s", video_ids, exc)
+        return False
+    logger.info("FB Poller: synced %d live video(s)", len(videos))
+    return True
+
+
+async def _sync_ended(video_ids: set[str]) -> bool:
+    """Mark the livestreams for these videos inactive in one request."""
+    if not video_ids:
+        return True
+    try:
+        await supabase_service.update_livestreams_by_video_ids(
+            list(video_ids),
+            {"is_active": False, "ended_at": now_iso()},
+        )
+    except Exception as exc:
+        logger.warning("FB Poller: failed to deactivate %s: %s", sorted(video_ids), exc)
+        return False
+    logger.info("FB Poller: marked %d video(s) as inactive", len(video_ids))
+    return True
+
 
+def _new_livestream_row(video: dict, started_at: str) -> dict:
+    """Livestream record for a newly detected live video (same keys for every row)."""
+    title = (video.get("title") or "Facebook Live").strip() or "Facebook Live"
     data: dict = {
         "title": title,
-        "facebook_video_id": vid_id,
+        "facebook_video_id": video["id"],
         "is_active": True,
         "is_private": False,
-        "started_at": datetime.now(timezone.utc).isoformat(),
+        "started_at": started_at,
     }
     if settings.FACEBOOK_DEFAULT_GROUP_ID:
         data["facebook_group_id"] = settings.FACEBOOK_DEFAULT_GROUP_ID
     if settings.FACEBOOK_DEFAULT_CLASS_ID:
         data["class_id"] = settings.FACEBOOK_DEFAULT_CLASS_ID
-
-    try:
-        await supabase_service.create_livestream_record(data)
-        logger.info("FB Poller: created livestream record for video %s", vid_id)
-    except Exception as exc:
-        logger.warning("FB Poller: failed to create record for %s: %s", vid_id, exc)
-
-
-async def _mark_ended(vid_id: str) -> None:
-    """Mark a livestream as inactive when the Facebook Live ends."""
-    try:
-        await supabase_service.deactivate_livestream_by_video_id(vid_id)
-        logger.info("FB Poller: marked video %s as inactive", vid_id)
-    except Exception as exc:
-        logger.warning("FB Poller: failed to deactivate %s: %s", vid_id, exc)
+    return data
@@ -0,0 +1,45 @@
+"""
+Shared outbound HTTP clients.
+
+Each upstream gets one long-lived httpx.AsyncClient so connections (and
+their TLS sessions) are pooled across requests instead of being re-opened
+per call. The clients are closed from the FastAPI lifespan on shutdown.
+"""
+
+import httpx
+from app.config import settings
+
+# Supabase PostgREST — every database query goes through this one pool.
+# HTTP/2 multiplexes concurrent queries over a few long-lived connections
+# instead of queueing them for a free HTTP/1.1 socket.
+supabase_client = httpx.AsyncClient(
+    base_url=f"{settings.SUPABASE_URL}/rest/v1",
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(
+        max_connections=100, max_keepalive_connections=20, keepalive_expiry=120
+    ),
+)
+
+# Facebook Graph API — token verification for login / account binding
+fb_client = httpx.AsyncClient(
+    base_url="https://graph.facebook.com",
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=50, keepalive_expiry=60),
+)
+
+# Local Ollama server — recommendation generation can take a while, but a
+# server that is down should fail fast rather than after the full timeout
+ollama_client = httpx.AsyncClient(
+    base_url=settings.OLLAMA_BASE_URL,
+    timeout=httpx.Timeout(90.0, connect=5.0),
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+)
+
+
+async def close_clients() -> None:
+    """Close every shared client (called on app shutdown)."""
+    await supabase_client.aclose()
+    await fb_client.aclose()
+    await ollama_client.aclose()
@@ -1,7 +1,8 @@
-import httpx
-import json
-from typing import Dict, List
+import hashlib
+import orjson
+from typing import AsyncIterator, Dict, List
 from app.config import settings
+from app.services.http import ollama_client
 
 _RECOMMENDATION_PROMPT = """\
 You are an educational advisor AI. Based on the student quiz performance below, recommend 2-3 schools or programs they are likely to excel in.
@@ -28,46 +29,47 @@ Respond ONLY with valid JSON in this exact shape:
   "general_advice": "..."
 }}"""
 
+# Split once around the placeholder (unescaping the JSON braces) so building
+# a prompt is two concatenations instead of a str.format parse per call
+_PROMPT_PREFIX, _PROMPT_SUFFIX = (
+    part.replace("{{", "{").replace("}}", "}")
+    for part in _RECOMMENDATION_PROMPT.split("{performance_summary}")
+)
 
-async def generate_school_recommendations(
-    student_id: str,
-    quiz_results: List[Dict],
-) -> Dict:
-    """Call local Ollama model to generate personalised school recommendations."""
-
-    # Aggregate scores per subject
-    subject_scores: Dict[str, List[float]] = {}
-    for r in quiz_results:
-        subject = r.get("subject", "General")
-        subject_scores.setdefault(subject, []).append(r.get("score_percentage", 0))
 
-    if subject_scores:
+def _build_prompt(summary: List[Dict]) -> str:
+    """summary: per-subject rows from supabase_service.get_student_subject_summary."""
+    if summary:
         lines = [
-            f"- {subj}: avg {sum(scores)/len(scores):.1f}% ({len(scores)} quiz{'zes' if len(scores)>1 else ''})"
-            for subj, scores in subject_scores.items()
+            f"- {r['subject']}: avg {r['avg_score']:.1f}% ({r['quizzes']} quiz{'zes' if r['quizzes'] > 1 else ''})"
+            for r in summary
         ]
-        summary = "\n".join(lines)
+        performance = "\n".join(lines)
     else:
-        summary = "No quiz data available yet."
-
-    prompt = _RECOMMENDATION_PROMPT.format(performance_summary=summary)
-
-    async with httpx.AsyncClient(timeout=90.0) as client:
-        response = await client.post(
-            f"{settings.OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": settings.OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "format": "json",
-            },
-        )
-        response.raise_for_status()
-        raw = response.json().get("response", "{}")
+        performance = "No quiz data available yet."
+
+    return f"{_PROMPT_PREFIX}{performance}{_PROMPT_SUFFIX}"
+
+
+def input_fingerprint(summary: List[Dict]) -> str:
+    """
+    SHA-256 of exactly what the model is sent (model name + rendered prompt),
+    so editing the prompt or switching models also invalidates cached output.
+    """
+    payload = f"{settings.OLLAMA_MODEL}\n{_build_prompt(summary)}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def quiz_count(summary: List[Dict]) -> int:
+    """How many quizzes a subject summary covers."""
+    return sum(r["quizzes"] for r in summary)
+
 
+def parse_recommendations(student_id: str, raw: str, based_on_quizzes: int) -> Dict:
+    """Turn the model's raw JSON text into the API response shape."""
     try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(raw)
+    except orjson.JSONDecodeError:
         parsed = {
             "recommendations": [],
             "general_advice": raw or "Unable to generate recommendations at this time.",
@@ -76,5 +78,45 @@ async def generate_school_recommendations(
     return {
         "student_id": student_id,
         "recommendations": parsed,
-        "based_on_quizzes": len(quiz_results),
+        "based_on_quizzes": based_on_quizzes,
     }
+
+
+async def generate_school_recommendations(
+    student_id: str,
+    summary: List[Dict],
+) -> Dict:
+    """Call local Ollama model to generate personalised school recommendations."""
+    # Consume the same stream as the SSE endpoint: the read timeout then bounds
+    # the gap between tokens rather than the whole completion, and a cancelled
+    # request closes the connection so Ollama stops generating
+    fragments = [f async for f in stream_school_recommendations(summary)]
+    raw = "".join(fragments) or "{}"
+
+    return parse_recommendations(student_id, raw, quiz_count(summary))
+
+
+async def stream_school_recommendations(summary: List[Dict]) -> AsyncIterator[str]:
+    """Yield the model's output fragments as Ollama produces them (NDJSON stream)."""
+    prompt = _build_prompt(summary)
+
+    async with ollama_client.stream(
+        "POST",
+        "/api/generate",
+        content=orjson.dumps({
+            "model": settings.OLLAMA_MODEL,
+            "prompt": prompt,
+            "stream": True,
+            "format": "json",
+        }),
+        headers={"Content-Type": "application/json"},
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                break
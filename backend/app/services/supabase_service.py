@@ -9,27 +9,38 @@ SupabaseException("Invalid API key") before making any network call.
 
 Direct httpx calls have no such restriction; we confirmed they work
 with the sb_secret_* service-role key.
+
+Every helper here is a coroutine over one pooled client, so callers that
+need several independent lookups should await them together with
+asyncio.gather rather than one after another. Each call is bounded by the
+current request's remaining time budget (app/deadline.py).
 """
 
 import httpx
+import orjson
 from fastapi import HTTPException
+from functools import lru_cache
+from types import MappingProxyType
 from app.config import settings
-from typing import Optional, List, Dict, Any
+from app.deadline import within_deadline
+from app.services.cache import ttl_cached
+from app.services.http import supabase_client
+from typing import Optional, List, Dict, Any, Mapping, Tuple
 
-# Build base URL and re-usable headers once at import time.
-# These use settings, so they are evaluated lazily via _headers() to avoid
-# import-time errors when settings are not yet loaded in tests.
+# The base URL lives on the shared client (app/services/http.py). The service
+# key never changes at runtime, so the auth headers are rendered once here.
+# Bodies are encoded/decoded with orjson (hence the explicit Content-Type).
+_BASE_HEADERS = MappingProxyType({
+    "apikey": settings.SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+    "Content-Type": "application/json",
+})
 
-def _base() -> str:
-    return f"{settings.SUPABASE_URL}/rest/v1"
 
-def _headers(prefer: str = "return=representation") -> dict:
-    return {
-        "apikey": settings.SUPABASE_SERVICE_KEY,
-        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": prefer,
-    }
+@lru_cache(maxsize=None)
+def _headers(prefer: str = "return=representation") -> Mapping[str, str]:
+    """Read-only request headers; built once per distinct Prefer value."""
+    return MappingProxyType({**_BASE_HEADERS, "Prefer": prefer})
 
 
 # ─── Low-level helpers ────────────────────────────────────────────────────────
@@ -38,106 +49,219 @@ def _raise(resp: httpx.Response) -> None:
     """Convert Supabase error responses into readable HTTPExceptions."""
     if resp.is_error:
         try:
-            body = resp.json()
+            body = orjson.loads(resp.content)
             detail = body.get("message") or body.get("details") or body.get("hint") or str(body)
         except Exception:
             detail = resp.text or f"HTTP {resp.status_code}"
         raise HTTPException(status_code=502, detail=f"Database error: {detail}")
 
 
-def _get(table: str, params: dict) -> list:
-    with httpx.Client(timeout=10) as client:
-        resp = client.get(f"{_base()}/{table}", headers=_headers(), params=params)
-        _raise(resp)
-        return resp.json() or []
-
-
-def _post(table: str, data: dict) -> dict:
-    with httpx.Client(timeout=10) as client:
-        resp = client.post(f"{_base()}/{table}", headers=_headers(), json=data)
-        _raise(resp)
-        result = resp.json()
-        return result[0] if isinstance(result, list) else result
+async def _get(
+    table: str, params: dict, offset: int = 0, limit: Optional[int] = None
+) -> list:
+    """
+    Matching rows, optionally one page of them via a PostgREST Range header.
+    `limit=None` means no upper bound (all rows from `offset` on).
+    """
+    headers = _headers()
+    if limit is not None or offset:
+        end = "" if limit is None else offset + limit - 1
+        headers = {**headers, "Range-Unit": "items", "Range": f"{offset}-{end}"}
+    resp = await within_deadline(
+        supabase_client.get(f"/{table}", headers=headers, params=params)
+    )
+    _raise(resp)
+    return orjson.loads(resp.content) or []
 
 
-def _patch(table: str, params: dict, data: dict) -> dict:
-    with httpx.Client(timeout=10) as client:
-        resp = client.patch(
-            f"{_base()}/{table}", headers=_headers(), params=params, json=data
-        )
-        _raise(resp)
-        result = resp.json()
-        return result[0] if isinstance(result, list) else result
+async def _post(table: str, data: dict) -> dict:
+    resp = await within_deadline(supabase_client.post(
+        f"/{table}", headers=_headers(), content=orjson.dumps(data)
+    ))
+    _raise(resp)
+    result = orjson.loads(resp.content)
+    return result[0] if isinstance(result, list) else result
 
 
-def _one(table: str, params: dict) -> Optional[dict]:
+async def _patch(table: str, params: dict, data: dict) -> Optional[dict]:
+    """
+    Update matching rows and return the first updated row, or None if nothing
+    matched. `return=representation` makes the PATCH itself echo the row, so
+    callers never need a follow-up SELECT to detect a missing record.
+    """
+    resp = await within_deadline(supabase_client.patch(
+        f"/{table}", headers=_headers(), params=params, content=orjson.dumps(data)
+    ))
+    _raise(resp)
+    result = orjson.loads(resp.content)
+    if isinstance(result, list):
+        return result[0] if result else None
+    return result
+
+
+async def _rpc(function: str, args: dict) -> Any:
+    """Call a Postgres function exposed by PostgREST at /rpc/<function>."""
+    resp = await within_deadline(supabase_client.post(
+        f"/rpc/{function}", headers=_headers(), content=orjson.dumps(args)
+    ))
+    _raise(resp)
+    return orjson.loads(resp.content)
+
+
+async def _one(table: str, params: dict) -> Optional[dict]:
     """Return the first matching row, or None."""
-    rows = _get(table, {**params, "limit": "1"})
+    rows = await _get(table, {**params, "limit": "1"})
     return rows[0] if rows else None
 
 
+async def _exists(table: str, params: dict) -> bool:
+    """
+    Whether any row matches, without transferring one: a HEAD request with
+    count=exact returns no body, just the total in Content-Range ("0-0/1").
+    """
+    resp = await within_deadline(supabase_client.head(
+        f"/{table}",
+        headers=_headers("count=exact"),
+        params={**params, "select": "id", "limit": "1"},
+    ))
+    _raise(resp)
+    total = resp.headers.get("content-range", "").rpartition("/")[2]
+    return total.isdigit() and int(total) > 0
+
+
 # ─── Users ────────────────────────────────────────────────────────────────────
 
+# Looked up on every token refresh and every auth-cache miss. update_user
+# invalidates; the TTL bounds staleness on other workers. Lookups by email /
+# Facebook ID stay uncached: they only run at login, where a cached "no such
+# user" would hide an account created moments earlier.
+@ttl_cached(maxsize=10_000, ttl=60)
 async def get_user_by_id(user_id: str) -> Optional[Dict]:
-    return _one("users", {"id": f"eq.{user_id}"})
+    return await _one("users", {"id": f"eq.{user_id}"})
 
 
 async def get_user_by_email(email: str) -> Optional[Dict]:
-    return _one("users", {"email": f"eq.{email}"})
+    return await _one("users", {"email": f"eq.{email}"})
 
 
 async def get_user_by_facebook_id(facebook_id: str) -> Optional[Dict]:
-    return _one("users", {"facebook_id": f"eq.{facebook_id}"})
+    return await _one("users", {"facebook_id": f"eq.{facebook_id}"})
 
 
 async def create_user(user_data: Dict) -> Dict:
-    return _post("users", user_data)
+    return await _post("users", user_data)
 
 
 async def update_user(user_id: str, updates: Dict) -> Dict:
-    return _patch("users", {"id": f"eq.{user_id}"}, updates)
+    user = await _patch("users", {"id": f"eq.{user_id}"}, updates)
+    get_user_by_id.cache_invalidate(user_id)
+    return user
 
 
 # ─── Livestreams ──────────────────────────────────────────────────────────────
 
-async def get_livestream(livestream_id: str) -> Optional[Dict]:
-    rows = _get(
+async def get_livestream(livestream_id: str, columns: str = "*") -> Optional[Dict]:
+    rows = await _get(
         "livestreams",
-        {"id": f"eq.{livestream_id}", "select": "*", "limit": "1"},
+        {"id": f"eq.{livestream_id}", "select": columns, "limit": "1"},
     )
     return rows[0] if rows else None
 
 
-async def get_livestreams_for_student(student_id: str) -> List[Dict]:
-    return _get("livestreams", {"select": "*", "order": "started_at.desc.nullslast"})
+async def get_livestream_with_enrollment(
+    livestream_id: str, student_id: str
+) -> Tuple[Optional[Dict], bool]:
+    """
+    Fetch a livestream and whether the student is enrolled in its class in a
+    single round-trip, by embedding the class's enrollments filtered to them.
+    """
+    rows = await _get(
+        "livestreams",
+        {
+            "id": f"eq.{livestream_id}",
+            "select": "id,class_id,is_active,classes(enrollments(id))",
+            "classes.enrollments.student_id": f"eq.{student_id}",
+            "limit": "1",
+        },
+    )
+    if not rows:
+        return None, False
+    stream = rows[0]
+    klass = stream.pop("classes", None) or {}
+    return stream, bool(klass.get("enrollments"))
+
+
+# List views (dashboard / admin) read only these; detail lookups keep "*"
+_LIVESTREAM_LIST_COLUMNS = (
+    "id,class_id,title,facebook_video_id,facebook_group_id,"
+    "is_active,scheduled_at,started_at"
+)
+
+
+async def get_livestreams_for_student(
+    student_id: str, offset: int = 0, limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Livestreams of the classes the student is enrolled in, in one round-trip.
+    The inner embeds turn the enrollment filter into a server-side join; the
+    empty enrollments() embed filters without adding its rows to the payload.
+    """
+    return await _get(
+        "livestreams",
+        {
+            "select": f"{_LIVESTREAM_LIST_COLUMNS},classes!inner(subject,enrollments!inner())",
+            "classes.enrollments.student_id": f"eq.{student_id}",
+            "order": "started_at.desc.nullslast",
+        },
+        offset,
+        limit,
+    )
 
 
-async def get_all_livestreams() -> List[Dict]:
-    return _get("livestreams", {"select": "*", "order": "started_at.desc.nullslast"})
+async def get_all_livestreams(offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    return await _get(
+        "livestreams",
+        {"select": _LIVESTREAM_LIST_COLUMNS, "order": "started_at.desc.nullslast"},
+        offset,
+        limit,
+    )
 
 
 # ─── Comments ─────────────────────────────────────────────────────────────────
 
 async def create_comment(comment_data: Dict) -> Dict:
-    return _post("comments", comment_data)
+    return await _post("comments", comment_data)
 
 
-async def get_comments_for_livestream(livestream_id: str) -> List[Dict]:
-    return _get(
+async def get_comments_for_livestream(
+    livestream_id: str, offset: int = 0, limit: int = 100
+) -> List[Dict]:
+    """
+    One page of comments, oldest first. Pages count back from the newest
+    comment, so the default page is the latest `limit` — what the chat shows.
+    """
+    rows = await _get(
         "comments",
         {
             "livestream_id": f"eq.{livestream_id}",
             "is_deleted": "eq.false",
-            "select": "*, users(full_name, avatar_url)",
-            "order": "created_at.asc",
+            "select": "id,student_id,content,created_at,users(full_name,avatar_url)",
+            "order": "created_at.desc",
         },
+        offset,
+        limit,
     )
+    rows.reverse()
+    return rows
 
 
 # ─── Quizzes ──────────────────────────────────────────────────────────────────
 
+# Every student in a live quiz/Q&A polls these; a few seconds of staleness is
+# fine and writers invalidate explicitly. Treat the returned dicts as read-only.
+@ttl_cached(maxsize=512, ttl=5)
 async def get_quiz(quiz_id: str) -> Optional[Dict]:
-    rows = _get(
+    rows = await _get(
         "quizzes",
         {"id": f"eq.{quiz_id}", "select": "*, quiz_questions(*)", "limit": "1"},
     )
@@ -145,40 +269,70 @@ async def get_quiz(quiz_id: str) -> Optional[Dict]:
 
 
 async def get_quizzes_for_class(class_id: str) -> List[Dict]:
-    return _get("quizzes", {"class_id": f"eq.{class_id}"})
+    return await _get(
+        "quizzes",
+        {
+            "class_id": f"eq.{class_id}",
+            "select": "id,class_id,title,subject,is_active,is_live,triggered_at,time_limit_seconds",
+        },
+    )
 
 
-async def submit_quiz_answer(answer_data: Dict) -> Dict:
-    return _post("quiz_answers", answer_data)
+# Scores only change when the student answers or an admin edits the quiz;
+# both paths invalidate, the TTL covers other workers.
+@ttl_cached(maxsize=4096, ttl=30)
+async def get_quiz_score(student_id: str, quiz_id: str) -> Optional[Dict]:
+    """{"score", "total", "answers"} computed in SQL (see schema.sql); None if no such quiz."""
+    return await _rpc(
+        "quiz_score", {"p_student_id": student_id, "p_quiz_id": quiz_id}
+    )
 
 
-async def get_student_quiz_answers(student_id: str, quiz_id: str) -> List[Dict]:
-    return _get(
-        "quiz_answers",
-        {"student_id": f"eq.{student_id}", "quiz_id": f"eq.{quiz_id}"},
-    )
+async def get_student_subject_summary(student_id: str) -> List[Dict]:
+    """
+    [{"subject", "avg_score", "quizzes"}, ...] ordered by subject, aggregated in
+    SQL (see schema.sql); empty if the student hasn't answered any quiz.
+    """
+    return await _rpc("student_subject_averages", {"p_student_id": student_id}) or []
 
 
-async def get_quiz_results_admin(quiz_id: str) -> List[Dict]:
-    return _get(
+async def get_quiz_results_admin(
+    quiz_id: str, offset: int = 0, limit: Optional[int] = None
+) -> List[Dict]:
+    return await _get(
         "quiz_answers",
-        {"quiz_id": f"eq.{quiz_id}", "select": "*, users(full_name, email)"},
+        {
+            "quiz_id": f"eq.{quiz_id}",
+            "select": "id,question_id,student_id,selected_option,submitted_at,users(full_name,email)",
+            "order": "submitted_at.asc,id.asc",
+        },
+        offset,
+        limit,
     )
 
 
 # ─── Q&A ──────────────────────────────────────────────────────────────────────
 
 async def create_qna_session(session_data: Dict) -> Dict:
-    return _post("qna_sessions", session_data)
+    return await _post("qna_sessions", session_data)
+
 
+# Only the asker's display name is embedded — never the rest of their user
+# row. Anonymous questions are masked per viewer in the route.
+_QNA_QUESTION_COLUMNS = (
+    "id,session_id,student_id,question_text,is_anonymous,is_answered,"
+    "answer_text,answered_at,submitted_at,users(full_name)"
+)
 
+
+@ttl_cached(maxsize=512, ttl=5)
 async def get_active_qna_session(class_id: str) -> Optional[Dict]:
-    rows = _get(
+    rows = await _get(
         "qna_sessions",
         {
             "class_id": f"eq.{class_id}",
             "is_active": "eq.true",
-            "select": "*, qna_questions(*)",
+            "select": f"*, qna_questions({_QNA_QUESTION_COLUMNS})",
             "limit": "1",
         },
     )
@@ -187,97 +341,195 @@ async def get_active_qna_session(class_id: str) -> Optional[Dict]:
 
 async def get_qna_session(session_id: str) -> Optional[Dict]:
     """Fetch a single Q&A session by ID (regardless of active status)."""
-    return _one("qna_sessions", {"id": f"eq.{session_id}", "select": "id,is_active"})
+    return await _one(
+        "qna_sessions", {"id": f"eq.{session_id}", "select": "id,class_id,is_active"}
+    )
 
 
 async def submit_qna_question(question_data: Dict) -> Dict:
-    return _post("qna_questions", question_data)
+    return await _post("qna_questions", question_data)
 
 
 # ─── Livestream Admin Actions ────────────────────────────────────────────────
 
 async def create_livestream_record(data: Dict) -> Dict:
-    return _post("livestreams", data)
+    return await _post("livestreams", data)
 
 
 async def update_livestream_record(livestream_id: str, updates: Dict) -> Optional[Dict]:
-    rows = _patch(
-        "livestreams",
-        {"id": f"eq.{livestream_id}"},
-        updates,
-    )
-    return rows
+    """Single PATCH ... RETURNING round-trip; None means no such livestream."""
+    return await _patch("livestreams", {"id": f"eq.{livestream_id}"}, updates)
 
 # ─── Additional CRUD Helpers ─────────────────────────────────────────────────
 
+# Enrollments are managed outside the API, so only the TTL expires these
+@ttl_cached(maxsize=10_000, ttl=60)
 async def check_student_enrollment(student_id: str, class_id: str) -> bool:
-    rows = _get("enrollments", {"student_id": f"eq.{student_id}", "class_id": f"eq.{class_id}", "select": "id"})
-    return len(rows) > 0
+    return await _exists("enrollments", {"student_id": f"eq.{student_id}", "class_id": f"eq.{class_id}"})
 
 async def update_qna_question(question_id: str, updates: Dict) -> Dict:
-    return _patch("qna_questions", {"id": f"eq.{question_id}"}, updates)
+    return await _patch("qna_questions", {"id": f"eq.{question_id}"}, updates)
 
 async def update_qna_session(session_id: str, updates: Dict) -> Dict:
-    return _patch("qna_sessions", {"id": f"eq.{session_id}"}, updates)
+    return await _patch("qna_sessions", {"id": f"eq.{session_id}"}, updates)
 
 async def create_quiz_record(data: Dict) -> Dict:
-    return _post("quizzes", data)
+    return await _post("quizzes", data)
 
 async def add_quiz_question(data: Dict) -> Dict:
-    return _post("quiz_questions", data)
+    return await _post("quiz_questions", data)
 
 async def update_quiz_record(quiz_id: str, updates: Dict) -> Dict:
-    return _patch("quizzes", {"id": f"eq.{quiz_id}"}, updates)
+    return await _patch("quizzes", {"id": f"eq.{quiz_id}"}, updates)
 
-async def check_quiz_answer_exists(student_id: str, question_id: str) -> bool:
-    rows = _get("quiz_answers", {"student_id": f"eq.{student_id}", "question_id": f"eq.{question_id}", "select": "id"})
-    return len(rows) > 0
+async def submit_quiz_answer_checked(
+    student_id: str, quiz_id: str, question_id: str, selected_option: str
+) -> Dict:
+    """
+    Validate and insert an answer in one round-trip (see schema.sql).
+    Returns {"status": "ok", "answer": {...}} or {"status": "not_found" | "inactive" | "duplicate"}.
+    """
+    return await _rpc(
+        "submit_quiz_answer_checked",
+        {
+            "p_student_id": student_id,
+            "p_quiz_id": quiz_id,
+            "p_question_id": question_id,
+            "p_selected_option": selected_option,
+        },
+    )
 
-async def update_comment_record(comment_id: str, updates: Dict) -> Dict:
-    return _patch("comments", {"id": f"eq.{comment_id}"}, updates)
 
-async def get_quiz_questions_for_scoring(quiz_id: str) -> List[Dict]:
-    return _get("quiz_questions", {"quiz_id": f"eq.{quiz_id}", "select": "id, correct_answer"})
+async def submit_quiz_answers_checked(
+    student_id: str, quiz_id: str, answers: List[Dict]
+) -> Dict:
+    """
+    Validate the quiz once and insert every answer in a single round-trip.
+    `answers` items are {"question_id", "selected_option"}; already-answered
+    questions are skipped. Returns {"status": "ok", "answers": [...]} or
+    {"status": "not_found" | "inactive"}.
+    """
+    return await _rpc(
+        "submit_quiz_answers_checked",
+        {"p_student_id": student_id, "p_quiz_id": quiz_id, "p_answers": answers},
+    )
+
+async def update_comment_record(comment_id: str, updates: Dict) -> Dict:
+    return await _patch("comments", {"id": f"eq.{comment_id}"}, updates)
+
+async def get_cached_ai_recommendation(
+    student_id: str, input_hash: str, generated_after: str
+) -> Optional[Dict]:
+    """Cached recommendations generated from the same inputs since `generated_after`."""
+    return await _one(
+        "ai_recommendations",
+        {
+            "student_id": f"eq.{student_id}",
+            "input_hash": f"eq.{input_hash}",
+            "generated_at": f"gt.{generated_after}",
+            "select": "recommendations",
+        },
+    )
 
 async def upsert_ai_recommendation(data: Dict) -> Dict:
-    # PostgREST upsert is done via POST with a specific header
-    with httpx.Client(timeout=10) as client:
-        headers = _headers()
-        headers["Prefer"] = "resolution=merge-duplicates"
-        resp = client.post(f"{_base()}/ai_recommendations", headers=headers, json=data)
-        resp.raise_for_status()
-        return resp.json()
+    # PostgREST upsert is done via POST with a specific header; on_conflict
+    # targets the UNIQUE (student_id) constraint rather than the primary key
+    headers = _headers(prefer="resolution=merge-duplicates,return=representation")
+    resp = await within_deadline(supabase_client.post(
+        "/ai_recommendations",
+        headers=headers,
+        params={"on_conflict": "student_id"},
+        content=orjson.dumps(data),
+    ))
+    _raise(resp)
+    result = orjson.loads(resp.content)
+    return result[0] if isinstance(result, list) else result
 
 
 # ─── Classes ──────────────────────────────────────────────────────────────────
 
+@ttl_cached(maxsize=1, ttl=300)
 async def get_all_classes() -> List[Dict]:
-    return _get("classes", {"is_active": "eq.true", "order": "title.asc"})
+    return await _get(
+        "classes",
+        {"is_active": "eq.true", "select": "id,title,description,subject", "order": "title.asc"},
+    )
+
+
+async def get_class_page(
+    class_id: str, student_id: Optional[str] = None
+) -> Tuple[Optional[Dict], bool]:
+    """
+    A class with its quizzes and active Q&A session in one round-trip, plus
+    whether `student_id` (if given) is enrolled — the embedded enrollments are
+    filtered to that student, so a non-empty list means enrolled.
+    """
+    select = (
+        "id,title,description,subject,"
+        "quizzes(id,title,subject,is_active,is_live,triggered_at,time_limit_seconds),"
+        "qna_sessions(id,title,created_at)"
+    )
+    params = {
+        "id": f"eq.{class_id}",
+        "qna_sessions.is_active": "eq.true",
+        "qna_sessions.order": "created_at.desc",
+        "qna_sessions.limit": "1",
+    }
+    if student_id is not None:
+        select += ",enrollments(id)"
+        params["enrollments.student_id"] = f"eq.{student_id}"
+    klass = await _one("classes", {**params, "select": select})
+    if not klass:
+        return None, False
+    enrolled = bool(klass.pop("enrollments", None)) if student_id is not None else True
+    return klass, enrolled
 
 
 async def get_livestream_by_facebook_video_id(fb_video_id: str) -> Optional[Dict]:
-    return _one("livestreams", {"facebook_video_id": f"eq.{fb_video_id}"})
+    return await _one(
+        "livestreams",
+        {"facebook_video_id": f"eq.{fb_video_id}", "select": "id,is_active"},
+    )
 
 
-async def deactivate_livestream_by_video_id(fb_video_id: str) -> None:
-    """Mark a livestream as inactive when the Facebook Live ends."""
-    with httpx.Client(timeout=10) as client:
-        resp = client.patch(
-            f"{_base()}/livestreams",
-            headers=_headers(prefer="return=minimal"),
-            params={"facebook_video_id": f"eq.{fb_video_id}"},
-            json={"is_active": False},
-        )
-        # 404 (no rows) is fine — record may have been deleted manually
-        if resp.is_error and resp.status_code != 404:
-            _raise(resp)
+async def insert_missing_livestreams(rows: List[Dict]) -> None:
+    """
+    Bulk-insert livestream rows in one request, skipping any whose
+    facebook_video_id already exists (existing rows are left untouched).
+    Every row must have the same keys.
+    """
+    if not rows:
+        return
+    resp = await within_deadline(supabase_client.post(
+        "/livestreams",
+        headers=_headers(prefer="resolution=ignore-duplicates,return=minimal"),
+        params={"on_conflict": "facebook_video_id"},
+        content=orjson.dumps(rows),
+    ))
+    _raise(resp)
+
+
+async def update_livestreams_by_video_ids(fb_video_ids: List[str], updates: Dict) -> None:
+    """Apply the same update to every livestream for these Facebook videos in one PATCH."""
+    if not fb_video_ids:
+        return
+    resp = await within_deadline(supabase_client.patch(
+        "/livestreams",
+        headers=_headers(prefer="return=minimal"),
+        params={"facebook_video_id": f"in.({','.join(fb_video_ids)})"},
+        content=orjson.dumps(updates),
+    ))
+    _raise(resp)
 
 
 def get_supabase_client():
     """
-    TEMPORARY STUB: 
-    This allows the app to boot while we refactor the routes.
-    The app will only crash if an old route is actually triggered.
+    Fail-fast guard for the removed supabase-py client path.
+
+    Every route now uses the service functions above, which share one pooled
+    AsyncClient per process; supabase-py is not a dependency. Anything still
+    calling this crashes loudly instead of building a second, blocking
+    client. Do not memoize or revive it.
     """
     raise RuntimeError(
         "Legacy get_supabase_client was called! "
@@ -1,15 +1,23 @@
 """
-Convenience runner — starts the FastAPI dev server from any working directory.
-Usage: python backend/run.py
+Convenience runner — starts the FastAPI server from any working directory.
+Usage: python backend/run.py          (DEV=1 to auto-reload on code changes)
 """
-import subprocess
-import sys
 import os
 
+import uvicorn
+
 # Change to the backend directory so 'app' module is importable
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-subprocess.run(
-    [sys.executable, "-m", "uvicorn", "app.main:app", "--reload", "--port", "8000"],
-    check=False,
-)
+if __name__ == "__main__":
+    # Served in this process rather than a child interpreter. "auto" picks
+    # uvloop + httptools (installed by uvicorn[standard]) and falls back to
+    # asyncio/h11 where they are unavailable, e.g. on Windows.
+    uvicorn.run(
+        "app.main:app",
+        port=8000,
+        reload=os.getenv("DEV") == "1",
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
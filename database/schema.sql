@@ -48,7 +48,7 @@ CREATE TABLE livestreams (
     id                UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     class_id          UUID NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
     title             TEXT NOT NULL,
-    facebook_video_id TEXT,    -- Facebook video or live-stream ID
+    facebook_video_id TEXT UNIQUE,  -- Facebook video or live-stream ID (upsert target for the poller)
     facebook_group_id TEXT,    -- Facebook group ID (for private group streams)
     stream_url        TEXT,    -- Fallback direct stream URL
     is_active         BOOLEAN DEFAULT FALSE,
@@ -139,6 +139,7 @@ CREATE TABLE ai_recommendations (
     id               UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     student_id       UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     recommendations  JSONB,
+    input_hash       TEXT,                   -- SHA-256 of the model name + prompt the row was generated from
     generated_at     TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE (student_id)
 );
@@ -155,3 +156,146 @@ $$;
 CREATE TRIGGER trg_users_updated_at
     BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION _update_updated_at();
+
+-- ─── RPC: submit a quiz answer in one round-trip ──────────────────────────────
+-- Called by the backend (service role) via POST /rest/v1/rpc/submit_quiz_answer_checked.
+-- Checks the quiz exists and is active, then inserts. A second answer to the
+-- same question hits the UNIQUE (student_id, question_id) constraint and is
+-- skipped by ON CONFLICT DO NOTHING, so no separate duplicate SELECT is needed
+-- and concurrent submissions can't race past it.
+-- Returns {"status": "ok", "answer": {...}} or {"status": "not_found" | "inactive" | "duplicate"}.
+CREATE OR REPLACE FUNCTION submit_quiz_answer_checked(
+    p_student_id      UUID,
+    p_quiz_id         UUID,
+    p_question_id     UUID,
+    p_selected_option TEXT
+)
+RETURNS JSONB LANGUAGE plpgsql AS $$
+DECLARE
+    v_is_active BOOLEAN;
+    v_answer    quiz_answers;
+BEGIN
+    SELECT is_active INTO v_is_active FROM quizzes WHERE id = p_quiz_id FOR SHARE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+    IF NOT COALESCE(v_is_active, FALSE) THEN
+        RETURN jsonb_build_object('status', 'inactive');
+    END IF;
+
+    INSERT INTO quiz_answers (student_id, quiz_id, question_id, selected_option)
+    VALUES (p_student_id, p_quiz_id, p_question_id, p_selected_option)
+    ON CONFLICT (student_id, question_id) DO NOTHING
+    RETURNING * INTO v_answer;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'duplicate');
+    END IF;
+
+    RETURN jsonb_build_object('status', 'ok', 'answer', to_jsonb(v_answer));
+END;
+$$;
+
+-- Backend-only: the student ID is a parameter, so never expose it to client roles
+REVOKE EXECUTE ON FUNCTION submit_quiz_answer_checked(UUID, UUID, UUID, TEXT)
+    FROM PUBLIC, anon, authenticated;
+
+-- ─── RPC: submit several quiz answers at once ─────────────────────────────────
+-- Bulk variant of submit_quiz_answer_checked: one quiz check, then a single
+-- multi-row INSERT. p_answers is a JSON array of
+-- {"question_id": ..., "selected_option": ...}; questions already answered are
+-- skipped by the same ON CONFLICT rule.
+-- Returns {"status": "ok", "answers": [...inserted rows]} or {"status": "not_found" | "inactive"}.
+CREATE OR REPLACE FUNCTION submit_quiz_answers_checked(
+    p_student_id UUID,
+    p_quiz_id    UUID,
+    p_answers    JSONB
+)
+RETURNS JSONB LANGUAGE plpgsql AS $$
+DECLARE
+    v_is_active BOOLEAN;
+    v_answers   JSONB;
+BEGIN
+    SELECT is_active INTO v_is_active FROM quizzes WHERE id = p_quiz_id FOR SHARE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+    IF NOT COALESCE(v_is_active, FALSE) THEN
+        RETURN jsonb_build_object('status', 'inactive');
+    END IF;
+
+    WITH inserted AS (
+        INSERT INTO quiz_answers (student_id, quiz_id, question_id, selected_option)
+        SELECT p_student_id, p_quiz_id, a.question_id, a.selected_option
+        FROM jsonb_to_recordset(p_answers) AS a(question_id UUID, selected_option TEXT)
+        ON CONFLICT (student_id, question_id) DO NOTHING
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted)), '[]'::jsonb) INTO v_answers FROM inserted;
+
+    RETURN jsonb_build_object('status', 'ok', 'answers', v_answers);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION submit_quiz_answers_checked(UUID, UUID, JSONB)
+    FROM PUBLIC, anon, authenticated;
+
+-- ─── RPC: a student's score on one quiz ───────────────────────────────────────
+-- Called by the backend via POST /rest/v1/rpc/quiz_score. Joins answers to the
+-- answer key and counts correct ones in SQL, so the API makes one round-trip
+-- and does no per-answer work. Returns NULL if the quiz doesn't exist, else
+-- {"score": n, "total": n, "answers": [...]}.
+CREATE OR REPLACE FUNCTION quiz_score(p_student_id UUID, p_quiz_id UUID)
+RETURNS JSONB LANGUAGE sql STABLE AS $$
+    SELECT jsonb_build_object(
+        'total', (SELECT count(*) FROM quiz_questions WHERE quiz_id = q.id),
+        'score', (
+            SELECT count(*)
+            FROM quiz_answers qa
+            JOIN quiz_questions qq ON qq.id = qa.question_id AND qq.quiz_id = q.id
+            WHERE qa.student_id = p_student_id
+              AND qa.quiz_id = q.id
+              AND qa.selected_option = qq.correct_answer
+        ),
+        'answers', COALESCE((
+            SELECT jsonb_agg(to_jsonb(qa) ORDER BY qa.submitted_at)
+            FROM quiz_answers qa
+            WHERE qa.student_id = p_student_id AND qa.quiz_id = q.id
+        ), '[]'::jsonb)
+    )
+    FROM quizzes q
+    WHERE q.id = p_quiz_id;
+$$;
+
+REVOKE EXECUTE ON FUNCTION quiz_score(UUID, UUID)
+    FROM PUBLIC, anon, authenticated;
+
+-- ─── RPC: a student's average score per subject ───────────────────────────────
+-- Called by the backend via POST /rest/v1/rpc/student_subject_averages to
+-- build the AI recommendation prompt. Scores every quiz the student answered
+-- (correct answers / questions in the quiz) and averages them per subject in
+-- one round-trip. Quizzes without a subject are grouped as 'General'.
+CREATE OR REPLACE FUNCTION student_subject_averages(p_student_id UUID)
+RETURNS TABLE (subject TEXT, avg_score NUMERIC, quizzes INT)
+LANGUAGE sql STABLE AS $$
+    WITH per_quiz AS (
+        SELECT
+            COALESCE(NULLIF(q.subject, ''), 'General') AS subject,
+            COALESCE(
+                100.0 * count(*) FILTER (WHERE qa.selected_option = qq.correct_answer)
+                    / NULLIF((SELECT count(*) FROM quiz_questions WHERE quiz_id = q.id), 0),
+                0
+            ) AS pct
+        FROM quiz_answers qa
+        JOIN quizzes q ON q.id = qa.quiz_id
+        LEFT JOIN quiz_questions qq ON qq.id = qa.question_id AND qq.quiz_id = q.id
+        WHERE qa.student_id = p_student_id
+        GROUP BY q.id, q.subject
+    )
+    SELECT subject, round(avg(pct), 2), count(*)::INT
+    FROM per_quiz
+    GROUP BY subject
+    ORDER BY subject;
+$$;
+
+REVOKE EXECUTE ON FUNCTION student_subject_averages(UUID)
+    FROM PUBLIC, anon, authenticated;
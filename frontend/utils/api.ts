@@ -175,6 +175,10 @@ export const quizApi = {
       question_id: questionId,
       selected_option: selectedOption,
     }),
+  submitAnswers: (
+    quizId: string,
+    answers: { question_id: string; selected_option: string }[]
+  ) => api.post(`/api/quizzes/${quizId}/answers/bulk`, { answers }),
   getMyResults: (quizId: string) =>
     api.get(`/api/quizzes/${quizId}/my-results`),
   getAllResults: (quizId: string) =>
@@ -206,6 +210,7 @@ export const qnaApi = {
 
 export const classesApi = {
   list: () => api.get("/api/classes/"),
+  getPage: (classId: string) => api.get(`/api/classes/${classId}`),
 };
 
 export const aiApi = {